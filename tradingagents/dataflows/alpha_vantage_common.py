@@ -1,26 +1,85 @@
 import os
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
+import time
 from datetime import datetime
-from io import StringIO
-import warnings
+from concurrent.futures import ThreadPoolExecutor
 
-# Suppress pandas warnings about date parsing
-warnings.filterwarnings('ignore', category=UserWarning, message='Could not infer format')
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+from .response_cache import get_response_cache, make_key
 
 
 logger = logging.getLogger(__name__)
 
 API_BASE_URL = "https://www.alphavantage.co/query"
 
+# (connect, read) timeouts in seconds, so a stalled socket surfaces as requests.Timeout
+REQUEST_TIMEOUT = (5, 30)
+
+# Top-level keys of the informational/error JSON payloads Alpha Vantage returns
+_ERROR_KEYS = ("Information", "Note", "Error Message")
+
+# Phrases in an "Information" message that mean the request was throttled: the daily
+# limit ("rate limit"/"api key") or the per-second burst limit ("spreading out ...")
+_RATE_LIMIT_MARKERS = ("rate limit", "api key", "spreading out", "per second")
+
+# Upper bound on in-flight requests issued by gather_av
+MAX_CONCURRENT_REQUESTS = 5
+
+# Connection errors, timeouts and transient 5xx responses are retried by urllib3
+# with exponential backoff, honouring Retry-After when the server sends one
+_RETRY = Retry(
+    total=3,
+    backoff_factor=2.0,
+    status_forcelist=[502, 503, 504],
+    allowed_methods={"GET"},
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+# Failures while downloading the body happen after urllib3's Retry has handed the
+# response over, so they get one Python-level retry (see _get). requests raises a
+# dropped stream as ChunkedEncodingError and a mid-body read timeout as ConnectionError.
+BODY_READ_RETRIES = 1
+BODY_READ_RETRY_DELAY = 2.0
+_BODY_READ_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.ConnectionError,
+)
+
+# Shared session so repeated calls reuse pooled HTTPS connections instead of
+# paying a fresh TCP+TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=_RETRY))
+
+# Cached on first successful lookup; a missing key is re-checked on every call
+_API_KEY: str | None = None
+
 def get_api_key() -> str:
     """Retrieve the API key for Alpha Vantage from environment variables."""
-    api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
-    if not api_key:
-        raise ValueError("ALPHA_VANTAGE_API_KEY environment variable is not set.")
-    return api_key
+    global _API_KEY
+    if _API_KEY is None:
+        api_key = os.environ.get("ALPHA_VANTAGE_API_KEY")
+        if not api_key:
+            raise ValueError("ALPHA_VANTAGE_API_KEY environment variable is not set.")
+        _API_KEY = api_key
+    return _API_KEY
+
+def _is_valid_datetime(digits: str, hhmm: str = "0000") -> bool:
+    """Check that YYYYMMDD / HHMM digit strings form a real calendar date and time."""
+    try:
+        datetime(int(digits[:4]), int(digits[4:6]), int(digits[6:8]), int(hhmm[:2]), int(hhmm[2:]))
+    except ValueError:
+        return False
+    return True
 
 def format_datetime_for_api(date_input) -> str:
     """Convert various date formats to YYYYMMDDTHHMM format required by Alpha Vantage API."""
@@ -28,7 +87,21 @@ def format_datetime_for_api(date_input) -> str:
         # If already in correct format, return as-is
         if len(date_input) == 13 and 'T' in date_input:
             return date_input
-        # Try to parse common date formats
+        # Fast paths for YYYY-MM-DD and YYYY-MM-DD HH:MM, avoiding strptime.
+        # Only ASCII digits forming a real date/time qualify; anything else falls
+        # through to strptime, which validates (and normalises) it as before.
+        if len(date_input) == 10 and date_input[4] == '-' and date_input[7] == '-':
+            digits = date_input[:4] + date_input[5:7] + date_input[8:10]
+            if digits.isascii() and digits.isdigit() and _is_valid_datetime(digits):
+                return digits + "T0000"
+        elif (len(date_input) == 16 and date_input[4] == '-' and date_input[7] == '-'
+                and date_input[10] == ' ' and date_input[13] == ':'):
+            digits = date_input[:4] + date_input[5:7] + date_input[8:10]
+            hhmm = date_input[11:13] + date_input[14:16]
+            if (digits.isascii() and digits.isdigit() and hhmm.isascii() and hhmm.isdigit()
+                    and _is_valid_datetime(digits, hhmm)):
+                return digits + "T" + hhmm
+        # Fall back to parsing other variants of the supported formats
         try:
             dt = datetime.strptime(date_input, "%Y-%m-%d")
             return dt.strftime("%Y%m%dT0000")
@@ -50,7 +123,11 @@ class AlphaVantageRateLimitError(Exception):
 def _make_api_request(function_name: str, params: dict) -> dict | str:
     """Helper function to make API requests and handle responses.
 
-    This function includes retry logic and rate limiting to handle API failures gracefully.
+    Connection failures, timeouts and 5xx responses up to the response headers are
+    retried with backoff by the session's transport (see _RETRY); once that gives up
+    the error is raised as is. Only a failure while downloading the body, which urllib3
+    no longer covers, re-sends the request (see _get). Rate limits require inspecting
+    the body and are surfaced to the caller so it can fall back to another vendor.
 
     Args:
         function_name: Alpha Vantage API function name
@@ -63,45 +140,46 @@ def _make_api_request(function_name: str, params: dict) -> dict | str:
         AlphaVantageRateLimitError: When API rate limit is exceeded
         requests.RequestException: When network request fails
     """
-    import time
-    import random
+    return _make_single_api_request(function_name, params)
 
-    max_retries = 3
-    base_delay = 2.0
 
-    for attempt in range(max_retries + 1):
-        try:
-            return _make_single_api_request(function_name, params)
-        except (requests.ConnectionError, requests.Timeout, OSError) as e:
-            if attempt == max_retries:
-                logger.error(f"All {max_retries + 1} attempts failed. Final error: {e}")
-                raise
-
-            # Calculate delay with exponential backoff and jitter
-            delay = min(base_delay * (2 ** attempt), 60.0)
-            jitter = random.uniform(0, delay * 0.1)
-            delay += jitter
-
-            logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay:.2f}s")
-            time.sleep(delay)
-        except AlphaVantageRateLimitError:
-            # Rate limit errors should not be retried immediately
-            raise
-        except Exception as e:
-            # Other exceptions should not be retried
-            logger.error(f"Non-retryable exception: {e}")
-            raise
+def _get(api_params: dict, read_body):
+    """Send a streamed GET for api_params and return read_body(response).
 
+    Sending the request and raise_for_status are outside the Python retry: urllib3's
+    Retry has already run its attempts by the time requests raises. Only errors from
+    read_body, i.e. while the body is downloaded, get BODY_READ_RETRIES more attempts.
+    """
+    try:
+        for attempt in range(BODY_READ_RETRIES + 1):
+            with _SESSION.get(API_BASE_URL, params=api_params, timeout=REQUEST_TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+                try:
+                    return read_body(response)
+                except _BODY_READ_ERRORS as e:
+                    if attempt == BODY_READ_RETRIES:
+                        raise
+                    logger.warning(
+                        f"Reading response failed on attempt {attempt + 1}: {e}. "
+                        f"Retrying in {BODY_READ_RETRY_DELAY:.2f}s"
+                    )
+            time.sleep(BODY_READ_RETRY_DELAY)
+    except requests.RequestException as e:
+        logger.error(f"Alpha Vantage request failed: {e}")
+        raise
 
-def _make_single_api_request(function_name: str, params: dict) -> dict | str:
-    # Create a copy of params to avoid modifying the original
-    api_params = params.copy()
-    api_params.update({
+
+def _build_api_params(function_name: str, params: dict) -> dict:
+    """Merge request params with the function name, API key and entitlement."""
+    api_key = get_api_key()
+    # Build a new dict so the caller's params are not modified
+    api_params = {
+        **params,
         "function": function_name,
-        "apikey": get_api_key(),
+        "apikey": api_key,
         "source": "trading_agents",
-    })
-    
+    }
+
     # Handle entitlement parameter if present in params or global variable
     current_entitlement = globals().get('_current_entitlement')
     entitlement = api_params.get("entitlement") or current_entitlement
@@ -111,61 +189,162 @@ def _make_single_api_request(function_name: str, params: dict) -> dict | str:
     elif "entitlement" in api_params:
         # Remove entitlement if it's None or empty
         api_params.pop("entitlement", None)
-    
-    response = requests.get(API_BASE_URL, params=api_params)
-    response.raise_for_status()
 
-    response_text = response.text
-    
-    # Check if response is JSON (error responses are typically JSON)
+    return api_params
+
+
+def _cache_key(api_params: dict, *extra) -> str:
+    return make_key(
+        "alpha_vantage",
+        {key: value for key, value in api_params.items() if key != "apikey"},
+        *extra,
+    )
+
+
+def _is_error_payload(response_text: str) -> bool:
+    """Check a response body for Alpha Vantage's informational/error JSON.
+
+    Raises:
+        AlphaVantageRateLimitError: When the payload reports an exceeded rate limit
+    """
+    # Error responses are small JSON objects: CSV bodies start with a header letter,
+    # so checking the first byte and the head of the body avoids parsing large payloads
+    head = response_text[:512]
+    if not head.lstrip().startswith("{") or not any(
+        f'"{key}"' in head for key in _ERROR_KEYS
+    ):
+        return False
+
     try:
-        response_json = json.loads(response_text)
-        # Check for rate limit error
-        if "Information" in response_json:
-            info_message = response_json["Information"]
-            if "rate limit" in info_message.lower() or "api key" in info_message.lower():
-                raise AlphaVantageRateLimitError(f"Alpha Vantage rate limit exceeded: {info_message}")
-    except json.JSONDecodeError:
-        # Response is not JSON (likely CSV data), which is normal
-        pass
+        response_json = _json_loads(response_text)
+    except ValueError:
+        # json.JSONDecodeError and orjson.JSONDecodeError are both ValueErrors
+        return False
 
-    return response_text
+    # Check for rate limit error
+    if "Information" in response_json:
+        info_message = response_json["Information"]
+        if any(marker in info_message.lower() for marker in _RATE_LIMIT_MARKERS):
+            raise AlphaVantageRateLimitError(f"Alpha Vantage rate limit exceeded: {info_message}")
+    return any(key in response_json for key in _ERROR_KEYS)
+
+
+def _make_single_api_request(function_name: str, params: dict) -> dict | str:
+    api_params = _build_api_params(function_name, params)
+
+    # Identical requests (same function and params) are served from the on-disk cache
+    cache = get_response_cache()
+    if cache is not None:
+        cache_key = _cache_key(api_params)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # Alpha Vantage always returns UTF-8, so skip requests' charset detection
+    response_text = _get(api_params, lambda response: response.content.decode("utf-8"))
 
+    # Don't cache informational/error payloads, they are not real data
+    if not _is_error_payload(response_text) and cache is not None:
+        cache.set(cache_key, response_text)
+    return response_text
 
 
-def _filter_csv_by_date_range(csv_data: str, start_date: str, end_date: str) -> str:
+def _stream_filter(function_name: str, params: dict, start_date: str, end_date: str) -> str:
     """
-    Filter CSV data to include only rows within the specified date range.
+    Request a CSV time series and keep only rows within the specified date range.
+
+    Alpha Vantage returns series newest-first, so rows are read line by line from
+    the streamed response and filtering stops at the first row older than start_date
+    instead of buffering and re-parsing the whole payload. The rest of the body is
+    drained unparsed so the connection can go back to the session's pool. The
+    filtered result is cached per date range.
 
     Args:
-        csv_data: CSV string from Alpha Vantage API
-        start_date: Start date in yyyy-mm-dd format
-        end_date: End date in yyyy-mm-dd format
+        function_name: Alpha Vantage API function name (must return CSV)
+        params: API parameters
+        start_date: Start date, zero-padded yyyy-mm-dd (compared as text)
+        end_date: End date, zero-padded yyyy-mm-dd (compared as text)
 
     Returns:
-        Filtered CSV string
+        CSV string with the header and the rows within the date range
+
+    Raises:
+        AlphaVantageRateLimitError: When API rate limit is exceeded
+        requests.RequestException: When network request fails
     """
-    if not csv_data or csv_data.strip() == "":
-        return csv_data
+    api_params = _build_api_params(function_name, params)
 
-    try:
-        # Parse CSV data
-        df = pd.read_csv(StringIO(csv_data))
+    cache = get_response_cache()
+    if cache is not None:
+        cache_key = _cache_key(api_params, start_date, end_date)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    result, cacheable = _get(
+        api_params, lambda response: _read_filtered_csv(response, start_date, end_date)
+    )
+    if cacheable and cache is not None:
+        cache.set(cache_key, result)
+    return result
+
+
+def _read_filtered_csv(response, start_date: str, end_date: str) -> tuple[str, bool]:
+    """Read a streamed response for _stream_filter; returns (body, whether it is cacheable)."""
+    response.encoding = "utf-8"
+    lines = response.iter_lines(decode_unicode=True)
+
+    header = next(lines, "")
+    if not header:
+        return "", False
+    if header.lstrip().startswith("{"):
+        # Not CSV: an error/informational JSON payload
+        response_text = "\n".join([header, *lines])
+        return response_text, not _is_error_payload(response_text)
+
+    kept = [header]
+    for line in lines:
+        if not line:
+            continue
+        # ISO-8601 timestamps compare correctly as strings
+        row_date = line.split(",", 1)[0]
+        if row_date > end_date:
+            continue
+        if row_date < start_date:
+            # Drain the remaining rows without parsing them
+            for _ in response.iter_content(chunk_size=65536):
+                pass
+            break
+        kept.append(line)
+
+    return "\n".join(kept) + "\n", True
 
-        # Assume the first column is the date column (timestamp)
-        date_col = df.columns[0]
-        df[date_col] = pd.to_datetime(df[date_col])
 
-        # Filter by date range
-        start_dt = pd.to_datetime(start_date)
-        end_dt = pd.to_datetime(end_date)
+def gather_av(calls: list[tuple[str, dict]]) -> list[dict | str]:
+    """Issue several independent Alpha Vantage requests concurrently.
 
-        filtered_df = df[(df[date_col] >= start_dt) & (df[date_col] <= end_dt)]
+    Each call goes through _make_api_request (same retry/backoff and rate-limit
+    handling) on a small thread pool sharing the pooled session, so round-trip
+    latency overlaps instead of adding up.
 
-        # Convert back to CSV string
-        return filtered_df.to_csv(index=False)
+    Args:
+        calls: List of (function_name, params) tuples
+
+    Returns:
+        Responses in the same order as calls
+
+    Raises:
+        The first exception raised by any call, in call order
+    """
+    if not calls:
+        return []
+    if len(calls) == 1:
+        function_name, params = calls[0]
+        return [_make_api_request(function_name, params)]
 
-    except Exception as e:
-        # If filtering fails, return original data with a warning
-        print(f"Warning: Failed to filter CSV data by date range: {e}")
-        return csv_data
+    with ThreadPoolExecutor(max_workers=min(len(calls), MAX_CONCURRENT_REQUESTS)) as executor:
+        futures = [
+            executor.submit(_make_api_request, function_name, params)
+            for function_name, params in calls
+        ]
+        return [future.result() for future in futures]
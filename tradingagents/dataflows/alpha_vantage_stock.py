@@ -1,5 +1,5 @@
 from datetime import datetime
-from .alpha_vantage_common import _make_api_request, _filter_csv_by_date_range
+from .alpha_vantage_common import _stream_filter
 
 def get_stock(
     symbol: str,
@@ -20,6 +20,7 @@ def get_stock(
     """
     # Parse dates to determine the range
     start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
     today = datetime.now()
 
     # Choose outputsize based on whether the requested range is within the latest 100 days
@@ -33,6 +34,10 @@ def get_stock(
         "datatype": "csv",
     }
 
-    response = _make_api_request("TIME_SERIES_DAILY_ADJUSTED", params)
-
-    return _filter_csv_by_date_range(response, start_date, end_date)
\ No newline at end of file
+    # Row dates are compared as text, so pass zero-padded bounds (e.g. "2024-1-3" -> "2024-01-03")
+    return _stream_filter(
+        "TIME_SERIES_DAILY_ADJUSTED",
+        params,
+        start_dt.strftime("%Y-%m-%d"),
+        end_dt.strftime("%Y-%m-%d"),
+    )
\ No newline at end of file
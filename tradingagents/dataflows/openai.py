@@ -1,45 +1,91 @@
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from openai import OpenAI
 try:
     from zhipuai import ZhipuAI
 except ImportError:
     ZhipuAI = None
 from .config import get_config
+from .response_cache import get_response_cache, make_key
 
+# 提示词模板，在模块加载时定义一次，调用时只做.format填充
+_STOCK_NEWS_SYS = "请搜索{query}在{start_date}到{end_date}期间的社交媒体讨论。请确保只获取该时间段内发布的数据。"
+_STOCK_NEWS_USER = "请提供关于{query}从{start_date}到{end_date}期间的社交媒体讨论和分析。"
 
-def get_client():
-    """获取配置好的客户端"""
-    config = get_config()
+_GLOBAL_NEWS_SYS = "请搜索从{look_back_days}天前{curr_date}到{curr_date}期间对交易有信息价值的全球或宏观经济新闻。请确保只获取该时间段内发布的数据，限制结果为{limit}篇文章。"
+_GLOBAL_NEWS_USER = "请提供从{look_back_days}天前到{curr_date}期间对交易有重要影响的全球宏观经济新闻，最多{limit}篇。"
+
+_FUNDAMENTALS_SYS = "请搜索{ticker}在{curr_date}所在月份及前一个月的基本面分析讨论。请确保只获取该时间段内发布的数据。请以表格形式列出，包含PE/PS/现金流等指标。"
+_FUNDAMENTALS_USER = "请提供{ticker}在{curr_date}期间的基本面分析数据，包括PE比率、PS比率、现金流等关键财务指标。"
+
+
+def _is_zhipuai(provider):
+    return provider == "zhipuai" or provider == "智谱ai (glm)"
 
-    # 根据provider选择不同的API key
-    if config["llm_provider"] == "zhipuai" or config["llm_provider"] == "智谱ai (glm)":
-        api_key = os.getenv("GLM_API_KEY")
-        if not api_key:
-            raise ValueError("GLM_API_KEY环境变量未设置，请在.env文件中设置GLM_API_KEY")
 
+@functools.lru_cache(maxsize=4)
+def _build_client(provider, api_key, backend_url):
+    """按provider/api_key/backend_url构建客户端，结果会被缓存以复用底层连接池"""
+    if _is_zhipuai(provider):
         if ZhipuAI is not None:
             # 使用官方ZhipuAI SDK
             return ZhipuAI(api_key=api_key)
         else:
             # 如果官方SDK不可用，回退到OpenAI兼容客户端
             print("Warning: ZhipuAI SDK not available, falling back to OpenAI client")
-            return OpenAI(base_url=config["backend_url"], api_key=api_key)
+            return OpenAI(base_url=backend_url, api_key=api_key)
+    return OpenAI(base_url=backend_url, api_key=api_key)
+
+
+def get_client():
+    """获取配置好的客户端"""
+    config = get_config()
+
+    # 根据provider选择不同的API key
+    if _is_zhipuai(config["llm_provider"]):
+        api_key = os.getenv("GLM_API_KEY")
+        if not api_key:
+            raise ValueError("GLM_API_KEY环境变量未设置，请在.env文件中设置GLM_API_KEY")
     else:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY环境变量未设置")
-        return OpenAI(base_url=config["backend_url"], api_key=api_key)
 
+    return _build_client(config["llm_provider"], api_key, config["backend_url"])
+
+
+def reset_clients():
+    """清空缓存的客户端（用于测试或切换配置后强制重建）"""
+    _build_client.cache_clear()
+
+
+def create_chat_completion(client, model, messages, temperature=0.7, max_tokens=4096, top_p=1, use_cache=None):
+    """创建聊天完成请求，支持不同的API格式
 
-def create_chat_completion(client, model, messages, temperature=0.7, max_tokens=4096, top_p=1):
-    """创建聊天完成请求，支持不同的API格式"""
+    use_cache为None时只缓存确定性请求(temperature为0)；显式传入True/False可强制开启或关闭磁盘缓存。
+    """
     config = get_config()
     provider = config["llm_provider"].lower()
 
+    if use_cache is None:
+        use_cache = temperature == 0
+
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        cache_key = make_key(
+            "chat_completion", config["llm_provider"], config["backend_url"],
+            model, messages, temperature, max_tokens, top_p,
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return SimpleNamespace(role="assistant", content=cached)
+
     # 检查客户端类型
     client_type = type(client).__name__
 
-    if (provider == "zhipuai" or provider == "智谱ai (glm)") and client_type == "ZhipuAI":
+    if _is_zhipuai(provider) and client_type == "ZhipuAI":
         # 使用官方ZhipuAI SDK
         response = client.chat.completions.create(
             model=model,
@@ -47,7 +93,6 @@ def create_chat_completion(client, model, messages, temperature=0.7, max_tokens=
             temperature=temperature,
             max_tokens=max_tokens,
         )
-        return response.choices[0].message
     else:
         # 使用OpenAI兼容格式
         response = client.chat.completions.create(
@@ -57,55 +102,60 @@ def create_chat_completion(client, model, messages, temperature=0.7, max_tokens=
             max_tokens=max_tokens,
             top_p=top_p,
         )
-        return response.choices[0].message
 
+    message = response.choices[0].message
+    if cache is not None and message.content:
+        cache.set(cache_key, message.content)
+    return message
 
-def get_stock_news_openai(query, start_date, end_date):
-    config = get_config()
-    client = get_client()
 
-    system_prompt = f"请搜索{query}在{start_date}到{end_date}期间的社交媒体讨论。请确保只获取该时间段内发布的数据。"
-
-    messages = [
+def _stock_news_messages(query, start_date, end_date):
+    return [
         {
             "role": "system",
-            "content": system_prompt
+            "content": _STOCK_NEWS_SYS.format(query=query, start_date=start_date, end_date=end_date)
         },
         {
             "role": "user",
-            "content": f"请提供关于{query}从{start_date}到{end_date}期间的社交媒体讨论和分析。"
+            "content": _STOCK_NEWS_USER.format(query=query, start_date=start_date, end_date=end_date)
         }
     ]
 
-    response = create_chat_completion(
-        client=client,
-        model=config["quick_think_llm"],
-        messages=messages,
-        temperature=0.7,
-        max_tokens=4096,
-        top_p=1,
-    )
-
-    return response.content
-
 
-def get_global_news_openai(curr_date, look_back_days=7, limit=5):
-    config = get_config()
-    client = get_client()
+def _global_news_messages(curr_date, look_back_days=7, limit=5):
+    return [
+        {
+            "role": "system",
+            "content": _GLOBAL_NEWS_SYS.format(look_back_days=look_back_days, curr_date=curr_date, limit=limit)
+        },
+        {
+            "role": "user",
+            "content": _GLOBAL_NEWS_USER.format(look_back_days=look_back_days, curr_date=curr_date, limit=limit)
+        }
+    ]
 
-    system_prompt = f"请搜索从{look_back_days}天前{curr_date}到{curr_date}期间对交易有信息价值的全球或宏观经济新闻。请确保只获取该时间段内发布的数据，限制结果为{limit}篇文章。"
 
-    messages = [
+def _fundamentals_messages(ticker, curr_date):
+    return [
         {
             "role": "system",
-            "content": system_prompt
+            "content": _FUNDAMENTALS_SYS.format(ticker=ticker, curr_date=curr_date)
         },
         {
             "role": "user",
-            "content": f"请提供从{look_back_days}天前到{curr_date}期间对交易有重要影响的全球宏观经济新闻，最多{limit}篇。"
+            "content": _FUNDAMENTALS_USER.format(ticker=ticker, curr_date=curr_date)
         }
     ]
 
+
+def _complete(messages, config=None, client=None, use_cache=None):
+    """用quick_think_llm完成一组消息并返回文本内容
+
+    use_cache原样传给create_chat_completion；默认temperature为0.7，不会缓存，需调用方显式开启。
+    """
+    config = config or get_config()
+    client = client or get_client()
+
     response = create_chat_completion(
         client=client,
         model=config["quick_think_llm"],
@@ -113,35 +163,46 @@ def get_global_news_openai(curr_date, look_back_days=7, limit=5):
         temperature=0.7,
         max_tokens=4096,
         top_p=1,
+        use_cache=use_cache,
     )
 
     return response.content
 
 
-def get_fundamentals_openai(ticker, curr_date):
+def get_stock_news_openai(query, start_date, end_date, use_cache=None):
+    return _complete(_stock_news_messages(query, start_date, end_date), use_cache=use_cache)
+
+
+def get_global_news_openai(curr_date, look_back_days=7, limit=5, use_cache=None):
+    return _complete(_global_news_messages(curr_date, look_back_days, limit), use_cache=use_cache)
+
+
+def get_fundamentals_openai(ticker, curr_date, use_cache=None):
+    return _complete(_fundamentals_messages(ticker, curr_date), use_cache=use_cache)
+
+
+def fetch_all_openai(ticker, curr_date, start_date, end_date, look_back_days=7, limit=5, use_cache=None):
+    """并发获取股票新闻、全球新闻和基本面数据
+
+    三个请求互不依赖，在线程池中并发执行，总耗时约等于最慢的一个请求。
+
+    Returns:
+        (stock_news, global_news, fundamentals) 三元组
+    """
     config = get_config()
     client = get_client()
 
-    system_prompt = f"请搜索{ticker}在{curr_date}所在月份及前一个月的基本面分析讨论。请确保只获取该时间段内发布的数据。请以表格形式列出，包含PE/PS/现金流等指标。"
-
-    messages = [
-        {
-            "role": "system",
-            "content": system_prompt
-        },
-        {
-            "role": "user",
-            "content": f"请提供{ticker}在{curr_date}期间的基本面分析数据，包括PE比率、PS比率、现金流等关键财务指标。"
-        }
+    message_sets = [
+        _stock_news_messages(ticker, start_date, end_date),
+        _global_news_messages(curr_date, look_back_days, limit),
+        _fundamentals_messages(ticker, curr_date),
     ]
 
-    response = create_chat_completion(
-        client=client,
-        model=config["quick_think_llm"],
-        messages=messages,
-        temperature=0.7,
-        max_tokens=4096,
-        top_p=1,
-    )
+    with ThreadPoolExecutor(max_workers=len(message_sets)) as executor:
+        futures = [
+            executor.submit(_complete, messages, config, client, use_cache)
+            for messages in message_sets
+        ]
+        stock_news, global_news, fundamentals = (future.result() for future in futures)
 
-    return response.content
\ No newline at end of file
+    return stock_news, global_news, fundamentals
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from .config import get_config
+
+DEFAULT_EXPIRE = 86400  # seconds
+
+_caches: dict = {}
+_caches_lock = threading.Lock()
+
+
+def make_key(*parts) -> str:
+    """Build a stable sha256 cache key from JSON-serialisable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Small SQLite-backed key/value store for raw API responses."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+        self.prune_expired()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key: str, value: str, expire: int = DEFAULT_EXPIRE):
+        """Store value under key for expire seconds."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + expire),
+            )
+
+    def prune_expired(self):
+        """Delete every expired entry so the database doesn't grow without bound."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the response cache stored under the configured data_cache_dir.
+
+    Returns None when caching is disabled with config["response_cache"] = False.
+    """
+    config = get_config()
+    if not config.get("response_cache", True):
+        return None
+    path = os.path.join(config["data_cache_dir"], "api_responses.sqlite")
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = ResponseCache(path)
+        return cache
@@ -3,6 +3,9 @@ from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import yfinance as yf
 import os
+import pandas as pd
+from stockstats import wrap
+from .config import get_config
 from .stockstats_utils import StockstatsUtils
 
 def get_YFin_data_online(
@@ -194,11 +197,6 @@ def _get_stock_stats_bulk(
     Fetches data once and calculates indicator for all available dates.
     Returns dict mapping date strings to indicator values.
     """
-    from .config import get_config
-    import pandas as pd
-    from stockstats import wrap
-    import os
-    
     config = get_config()
     online = config["data_vendors"]["technical_indicators"] != "local"
     
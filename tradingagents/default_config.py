@@ -8,6 +8,8 @@ DEFAULT_CONFIG = {
         os.path.abspath(os.path.join(os.path.dirname(__file__), ".")),
         "dataflows/data_cache",
     ),
+    # Cache raw Alpha Vantage / LLM data responses on disk under data_cache_dir
+    "response_cache": True,
     # LLM settings
     "llm_provider": "zhipuai",
     "deep_think_llm": "glm-4.6",